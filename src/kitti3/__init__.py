@@ -1,11 +1,34 @@
-try:
-    import importlib.metadata as importlib_metadata
-except ImportError:
-    import importlib_metadata
-_dist_meta = importlib_metadata.metadata("kitti3")
-__author__ = _dist_meta["Author"]
-__description__ = _dist_meta["Summary"]
-__project__ = _dist_meta["Name"]
-__url__ = _dist_meta["Home-Page"]
-__version__ = _dist_meta["Version"]
-del _dist_meta
+import sys
+
+from ._version import __version__
+
+_DIST_META_KEYS = {
+    "__author__": "Author",
+    "__description__": "Summary",
+    "__project__": "Name",
+    "__url__": "Home-Page",
+}
+
+
+def _load_dist_meta():
+    try:
+        import importlib.metadata as importlib_metadata
+    except ImportError:
+        import importlib_metadata
+    dist_meta = importlib_metadata.metadata("kitti3")
+    for attr, key in _DIST_META_KEYS.items():
+        globals()[attr] = dist_meta[key]
+
+
+def __getattr__(name):
+    # distribution metadata is only needed by tooling, so defer the (slow) lookup
+    # until one of the attributes is actually accessed
+    if name not in _DIST_META_KEYS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    _load_dist_meta()
+    return globals()[name]
+
+
+# module __getattr__ (PEP 562) is ignored before 3.7, so resolve eagerly there
+if sys.version_info < (3, 7):
+    _load_dist_meta()
@@ -1,11 +1,17 @@
 import argparse
-import logging
+import os
 import sys
-from typing import Callable, Iterable, List, Optional, Tuple, Type, TypeVar
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
-import i3ipc
-
-from .kitt import Kitti3, Kitts
 from .util import AnimParams, Client, Cattr, Pos, Shape
 
 try:
@@ -13,6 +19,9 @@ try:
 except ImportError:
     __version__ = "N/A"
 
+if TYPE_CHECKING:
+    import i3ipc
+
 
 DEFAULTS = {
     "crosstalk_delay": 0.015,
@@ -25,37 +34,24 @@ DEFAULTS = {
 }
 
 CLIENTS = {
-    "kitty": {
-        "i3": {
-            "cmd": "--no-startup-id kitty --name {}",
-            "cattr": Cattr.INSTANCE,
-        },
-        "sway": {
-            "cmd": "kitty --class {}",
-            "cattr": Cattr.APP_ID,
-        },
-    },
-    "alacritty": {
-        "i3": {
-            "cmd": "--no-startup-id alacritty --class {}",
-            "cattr": Cattr.INSTANCE,
-        },
-        "sway": {
-            "cmd": "alacritty --class {}",
-            "cattr": Cattr.APP_ID,
-        },
-    },
-    "firefox": {
-        "i3": {
-            "cmd": "firefox --class {}",
-            "cattr": Cattr.CLASS,
-        },
-        "sway": {
-            "cmd": "GDK_BACKEND=wayland firefox --name {}",
-            "cattr": Cattr.APP_ID,
-        },
-    },
+    ("kitty", "i3"): Client("--no-startup-id kitty --name {}", Cattr.INSTANCE),
+    ("kitty", "sway"): Client("kitty --class {}", Cattr.APP_ID),
+    ("alacritty", "i3"): Client("--no-startup-id alacritty --class {}", Cattr.INSTANCE),
+    ("alacritty", "sway"): Client("alacritty --class {}", Cattr.APP_ID),
+    ("firefox", "i3"): Client("firefox --class {}", Cattr.CLASS),
+    ("firefox", "sway"): Client("GDK_BACKEND=wayland firefox --name {}", Cattr.APP_ID),
 }
+CLIENT_NAMES = tuple(dict.fromkeys(client for client, _ in CLIENTS))
+
+_DEBUG_DATEFMT = "%Y-%m-%dT%H:%M:%S"
+_DEBUG_FORMAT = (
+    "%(asctime)s.%(msecs)03d %(levelname)-7s"
+    " %(filename) 4s:%(lineno)03d"
+    " %(name)s.%(funcName)-12s %(message)s"
+)
+
+# options that make the parser print and exit without needing the host
+_INFO_FLAGS = frozenset(("-h", "--help", "-v", "--version", "--list-clients"))
 
 
 class _ListClientsAction(argparse.Action):
@@ -75,29 +71,44 @@ class _ListClientsAction(argparse.Action):
         )
 
     def __call__(self, parser, namespace, values, option_string=None):
-        print("Kitti3 known clients")
-        for client, hosts in CLIENTS.items():
-            print(f"\n{client}")
-            for host, props in hosts.items():
-                print(f"  {host}")
-                for prop, val in props.items():
-                    print(f"    {prop}: {val}")
+        _print_clients()
         parser.exit()
 
 
-def _try_ipc(conn: i3ipc.Connection, cmd: str):
+def _print_clients() -> None:
+    lines = ["Kitti3 known clients"]
+    prev_client = None
+    for (client, host), props in CLIENTS.items():
+        if client != prev_client:
+            lines.append(f"\n{client}")
+            prev_client = client
+        lines.append(f"  {host}")
+        lines.extend(f"    {prop}: {val}" for prop, val in props._asdict().items())
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def _try_ipc(conn: "i3ipc.Connection", cmd: str):
     try:
         conn.command(cmd)
     except BrokenPipeError:
         pass
 
 
+def _sway_from_env() -> Optional[bool]:
+    # i3ipc connects to I3SOCK before SWAYSOCK. Sway exports both with the same
+    # value, whereas i3 never sets SWAYSOCK, so a stale SWAYSOCK alongside a live
+    # i3's I3SOCK doesn't count
+    path = os.environ.get("I3SOCK") or os.environ.get("SWAYSOCK")
+    if not path:
+        return None
+    return path == os.environ.get("SWAYSOCK")
+
+
 def _split_args(args: List[str]) -> Tuple[List, Optional[List]]:
-    try:
-        split = args.index("--")
-        return args[:split], args[split + 1 :]
-    except ValueError:
+    if "--" not in args:
         return args, None
+    split = args.index("--")
+    return args[:split], args[split + 1 :]
 
 
 def _format_choices(choices: Iterable):
@@ -105,6 +116,12 @@ def _format_choices(choices: Iterable):
     return f"{{{choice_strs}}}"
 
 
+_POS_CHOICES_STR = _format_choices(list(Pos))
+_CATTR_CHOICES = list(Cattr)
+_CATTR_CHOICES_STR = _format_choices(_CATTR_CHOICES)
+_CLIENT_CHOICES_STR = _format_choices(CLIENT_NAMES)
+
+
 T = TypeVar("T", int, float)
 
 
@@ -123,6 +140,11 @@ def _num_in(type_: Type[T], min_: T, max_: T) -> Callable[[str], T]:
     return validator
 
 
+_anim_duration = _num_in(float, 0.01, 1)
+_anim_fps = _num_in(int, 1, 100)
+_crosstalk_delay = _num_in(float, 0.001, 0.2)
+
+
 def _parse_args(argv: List[str], host: str, defaults: dict) -> argparse.Namespace:
     ap = argparse.ArgumentParser(
         add_help=False,
@@ -140,14 +162,13 @@ def _parse_args(argv: List[str], host: str, defaults: dict) -> argparse.Namespac
         action="store_true",
         help="[flag] enable slide-in animation",
     )
-    ag_look.add_argument(
+    # validated after parsing, as compat and anchor depend on the name given
+    _po = ag_look.add_argument(
         "-p",
         "--position",
-        type=Pos.from_str,
-        choices=list(Pos),
         help=(
-            f"POSITION ({_format_choices(list(Pos))}, default:"
-            f" '{DEFAULTS['position']}'): where to position the client window within"
+            f"POSITION ({_POS_CHOICES_STR}, default:"
+            " '%(default)s'): where to position the client window within"
             " the workspace, e.g. 'TL' for Top Left, or 'BC' for Bottom Center"
             " (first character anchors animation)"
         ),
@@ -171,9 +192,9 @@ def _parse_args(argv: List[str], host: str, defaults: dict) -> argparse.Namespac
     _anim_show = ag_look.add_mutually_exclusive_group()
     _anim_show.add_argument(
         "--anim-show",
-        type=_num_in(float, 0.01, 1),
+        type=_anim_duration,
         help=(
-            f"DURATION ([0.01, 1], default: {DEFAULTS['anim_show']}):"
+            "DURATION ([0.01, 1], default: %(default)s):"
             " duration of animated slide-in. Disable with --no-anim-show"
         ),
         metavar="",
@@ -188,9 +209,9 @@ def _parse_args(argv: List[str], host: str, defaults: dict) -> argparse.Namespac
     _anim_hide = ag_look.add_mutually_exclusive_group()
     _anim_hide.add_argument(
         "--anim-hide",
-        type=_num_in(float, 0.01, 1),
+        type=_anim_duration,
         help=(
-            f"DURATION ([0.01, 1], default: {DEFAULTS['anim_hide']}):"
+            "DURATION ([0.01, 1], default: %(default)s):"
             " duration of animated slide-out. Disable with --no-anim-hide"
         ),
         metavar="",
@@ -205,9 +226,9 @@ def _parse_args(argv: List[str], host: str, defaults: dict) -> argparse.Namespac
 
     ag_look.add_argument(
         "--anim-fps",
-        type=_num_in(int, 1, 100),
+        type=_anim_fps,
         help=(
-            f"FPS ([1, 100], default: {DEFAULTS['anim_fps']}):"
+            "FPS ([1, 100], default: %(default)s):"
             " target animation frames per second"
         ),
         metavar="",
@@ -229,7 +250,7 @@ def _parse_args(argv: List[str], host: str, defaults: dict) -> argparse.Namespac
         "--client",
         dest="cmd",
         help=(
-            f"CLIENT (expression or {_format_choices(CLIENTS.keys())}, default:"
+            f"CLIENT (expression or {_CLIENT_CHOICES_STR}, default:"
             " 'kitty'): a custom command expression or shorthand for one of Kitti3's"
             " known clients. For the former, a placeholder for NAME is required, e.g."
             " 'myapp --class {}"
@@ -250,7 +271,7 @@ def _parse_args(argv: List[str], host: str, defaults: dict) -> argparse.Namespac
         "-n",
         "--name",
         help=(
-            f"NAME (string, default: '{DEFAULTS['name']}'): name used to identify the"
+            "NAME (string, default: '%(default)s'): name used to identify the"
             " CLIENT via CATTR. Must match the keybinding used in the i3/Sway config"
             " (e.g. `bindsym $mod+n nop NAME`)"
         ),
@@ -260,9 +281,9 @@ def _parse_args(argv: List[str], host: str, defaults: dict) -> argparse.Namespac
         "-t",
         "--cattr",
         type=Cattr.from_str,
-        choices=list(Cattr),
+        choices=_CATTR_CHOICES,
         help=(
-            f"CATTR ({_format_choices(list(Cattr))}): criterium attribute used to"
+            f"CATTR ({_CATTR_CHOICES_STR}): criterium attribute used to"
             " match a CLIENT instance to its NAME. Only required if a custom"
             " expression is provided for CLIENT. If CATTR is provided but no CLIENT,"
             " spawning is diabled and assumed to be handled by the user"
@@ -274,10 +295,10 @@ def _parse_args(argv: List[str], host: str, defaults: dict) -> argparse.Namespac
     _crosstalk = ag_misc.add_mutually_exclusive_group()
     _crosstalk.add_argument(
         "--crosstalk-delay",
-        type=_num_in(float, 0.001, 0.2),
+        type=_crosstalk_delay,
         dest="crosstalk_delay",
         help=(
-            f"MS ([0.001, 0.2], default: {DEFAULTS['crosstalk_delay']} seconds): (sway)"
+            "MS ([0.001, 0.2], default: %(default)s seconds): (sway)"
             " atomic transaction crosstalk mitigation. Experiment with this if"
             " re-floated windows don't resize properly. Disable with"
             " --no-crosstalk-delay"
@@ -317,37 +338,46 @@ def _parse_args(argv: List[str], host: str, defaults: dict) -> argparse.Namespac
 
     args = ap.parse_args(argv)
 
+    def _fail(action: argparse.Action, msg: str) -> None:
+        ap.error(str(argparse.ArgumentError(action, msg)))
+
+    pos_name = args.position
+    try:
+        args.position = Pos.from_str(pos_name)
+    except argparse.ArgumentTypeError as e:
+        _fail(_po, str(e))
+    anchor = Pos.anchor_for(pos_name)
+
     try:
-        args.shape = Shape.from_strs(args.shape, args.position.compat)
+        args.shape = Shape.from_strs(args.shape, Pos.is_compat(pos_name))
     except argparse.ArgumentTypeError as e:
-        ap.error(str(argparse.ArgumentError(_sh, str(e))))
+        _fail(_sh, str(e))
 
     if args.cmd is None:
         # default to Kitty for backwards compatibility
         if args.cattr is None:
             args.cmd = "kitty"
-    elif args.cmd not in CLIENTS:
+    elif args.cmd not in CLIENT_NAMES:
         if args.cattr is None:
             msg = (
                 f"'{args.cmd}' is not a known client; if it is a custom expression,"
                 " CATTR must also be provided"
             )
-            ap.error(str(argparse.ArgumentError(_cl, msg)))
+            _fail(_cl, msg)
         elif "{}" not in args.cmd:
             msg = (
                 f"custom client expression '{args.cmd}' must contain a '{{}}'"
                 " placeholder for NAME"
             )
-            ap.error(str(argparse.ArgumentError(_cl, msg)))
-    if args.cmd in CLIENTS:
-        c = CLIENTS[args.cmd][host]
-        args.cmd = c["cmd"]
-        args.cattr = c["cattr"]
-    args.client = Client(args.cmd, args.cattr)
+            _fail(_cl, msg)
+    if args.cmd in CLIENT_NAMES:
+        args.client = CLIENTS[(args.cmd, host)]
+    else:
+        args.client = Client(args.cmd, args.cattr)
 
     args.anim_params = AnimParams(
-        (args.animate and args.position.anchor is not None),
-        args.position.anchor,
+        (args.animate and anchor is not None),
+        anchor,
         args.anim_show,
         args.anim_hide,
         args.anim_fps,
@@ -359,38 +389,56 @@ def _parse_args(argv: List[str], host: str, defaults: dict) -> argparse.Namespac
             f"'{args.bindsym}' looks malformed - remember to escape $ on the"
             f" commandline (e.g. '\\$mod{args.bindsym}')"
         )
-        ap.error(str(argparse.ArgumentError(_bs, msg)))
+        _fail(_bs, msg)
 
     return args
 
 
 def cli() -> None:
-    # FIXME: half-baked way of checking what host we're running on.
-    conn = i3ipc.Connection()
-    host, _Kitt = {
-        True: ("sway", Kitts),
-        False: ("i3", Kitti3),
-    }["sway" in conn.socket_path]
-
     argv_kitti3, argv_client = _split_args(sys.argv[1:])
+    if argv_kitti3 == ["--list-clients"]:
+        # common case; in combination with other options, leave it to the parser
+        _print_clients()
+        sys.exit()
+    if not _INFO_FLAGS.isdisjoint(argv_kitti3):
+        # the parser exits on these (or errors if one was passed as an option's
+        # value), so there's no point in connecting to the host first
+        _parse_args(argv_kitti3, "i3", DEFAULTS)
+
+    # deferred to keep importing the CLI module free of the IPC machinery
+    import i3ipc
+
+    from .kitt import Kitti3, Kitts
+
+    conn = None
+    sway = _sway_from_env()
+    if sway is None:
+        conn = i3ipc.Connection()
+        # the socket path can be anything, so ask the host: sway reports its own
+        # (1.x) version, i3 a 4.x one
+        sway = conn.get_version().major < 4
+    if sway:
+        host, _Kitt = "sway", Kitts
+    else:
+        host, _Kitt = "i3", Kitti3
+
     args = _parse_args(argv_kitti3, host, DEFAULTS)
+    if conn is None:
+        conn = i3ipc.Connection()
 
     if args.debug:
+        import logging
+
         logging.basicConfig(
-            datefmt="%Y-%m-%dT%H:%M:%S",
-            format=(
-                "%(asctime)s.%(msecs)03d %(levelname)-7s"
-                " %(filename) 4s:%(lineno)03d"
-                " %(name)s.%(funcName)-12s %(message)s"
-            ),
-            level=logging.DEBUG,
+            datefmt=_DEBUG_DATEFMT, format=_DEBUG_FORMAT, level=logging.DEBUG
         )
     if args.bindsym is not None and host == "sway":
         cmd = f'bindsym "{args.bindsym}" "nop {args.name}"'
         ret = conn.command(cmd)[0]
-        logging.debug("%s -> %s", cmd, ret.success and "OK" or ret.error)
         import atexit
+        import logging
 
+        logging.debug("%s -> %s", cmd, ret.success and "OK" or ret.error)
         # cleanup (only effective on user exit)
         atexit.register(lambda: _try_ipc(conn, f"un{cmd}"))
 
@@ -1,14 +1,40 @@
 import enum
-import functools
 import logging
+import operator
 import time
-from types import SimpleNamespace
-from typing import List, Optional
+from typing import Dict, List, NamedTuple, Optional
 
 import i3ipc
 
 from .util import AnimParams, Client, Cattr, Loc, Pos, Rect, Shape, animate
 
+# fraction of the leftover space placed before the window along each axis
+_ALIGN = {
+    Loc.LEFT: 0.0,
+    Loc.TOP: 0.0,
+    Loc.CENTER: 0.5,
+    Loc.RIGHT: 1.0,
+    Loc.BOTTOM: 1.0,
+}
+_PPT_REF = Rect(0, 0, 100, 100)
+_SCRATCH_WS = "__i3_scratch"
+
+
+class _Commands(NamedTuple):
+    crit: str = "[{}={}]"
+    fetch: str = "move container to workspace {}"
+    float_: str = "floating enable, border none"
+    focus: str = "focus"
+    hide: str = "floating enable, move scratchpad"
+    move: str = "move position {}ppt {}ppt"
+    move_abs: str = "move absolute position {}px {}px"
+    resize: str = "resize set {}ppt {}ppt"
+    resize_abs: str = "resize set {}px {}px"
+    rule: str = "for_window"
+
+
+_COMMANDS = _Commands()
+
 
 class Event(enum.Enum):
     HIDE = enum.auto()
@@ -19,6 +45,41 @@ class Event(enum.Enum):
 
 
 class Kitt:
+    __slots__ = (
+        "i3",
+        "name",
+        "shape",
+        "pos",
+        "client",
+        "client_argv",
+        "anim",
+        "loyal",
+        "crosstalk_delay",
+        "log",
+        "con_id",
+        "con_ws",
+        "con_rect",
+        "focused_ws",
+        "_ppt_rect",
+        "_rect_cache",
+        "_align_x",
+        "_align_y",
+        "_escaped_name",
+        "_follow_mark",
+        "_get_cattr",
+        "_rule_pre",
+        "_spawn_cmd",
+        "_trigger",
+    )
+    # (event, handler method name) pairs registered with the connection
+    _EVENTS = (
+        ("binding", "on_keybind"),
+        ("window::new", "on_spawned"),
+        ("window::floating", "on_floated"),
+        ("window::move", "on_moved"),
+        ("shutdown::exit", "on_shutdown"),
+    )
+
     def __init__(
         self,
         conn: i3ipc.Connection,
@@ -42,28 +103,34 @@ class Kitt:
         self.crosstalk_delay = crosstalk_delay
 
         self.log = logging.getLogger(self.__class__.__name__)
-        self.debug = self.log.getEffectiveLevel() == logging.DEBUG
         self.con_id: Optional[int] = None
         self.con_ws: Optional[i3ipc.Con] = None
+        self.con_rect: Optional[Rect] = None
         self.focused_ws: Optional[i3ipc.Con] = None
-        self.commands = SimpleNamespace(
-            crit="[{}={}]",
-            fetch="move container to workspace {}",
-            float_="floating enable, border none",
-            focus="focus",
-            hide="floating enable, move scratchpad",
-            move="move position {}ppt {}ppt",
-            move_abs="move absolute position {}px {}px",
-            resize="resize set {}ppt {}ppt",
-            resize_abs="resize set {}px {}px",
-            rule="for_window",
+        self._align_x = _ALIGN[pos.x]
+        self._align_y = _ALIGN[pos.y]
+        self._ppt_rect = self._compute_target_rect(None)
+        self._rect_cache: Dict[Rect, Rect] = {}
+        # marks are unique, so unless loyal, follow the mark rather than the con_id
+        self._follow_mark = client.cattr == Cattr.CON_MARK and not loyal
+        self._get_cattr = operator.attrgetter(client.cattr.value)
+        self._trigger = f"nop {name}"
+        self._escaped_name = self._escape(name)
+        self._rule_pre = (
+            f"{_COMMANDS.rule} "
+            f"{_COMMANDS.crit.format(client.cattr, self._escaped_name)}"
         )
+        self._spawn_cmd: Optional[str] = None
+        if client.cmd is not None:
+            self._spawn_cmd = f"exec {client.cmd.format(self._escaped_name)}"
+            if client_argv:
+                self._spawn_cmd = f"{self._spawn_cmd} {' '.join(client_argv)}"
 
-        self.i3.on("binding", self.on_keybind)
-        self.i3.on("window::new", self.on_spawned)
-        self.i3.on("window::floating", self.on_floated)
-        self.i3.on("window::move", self.on_moved)
-        self.i3.on("shutdown::exit", self.on_shutdown)
+        self._subscribe()
+
+    def _subscribe(self) -> None:
+        for event, handler in self._EVENTS:
+            self.i3.on(event, getattr(self, handler))
 
     def align_to_ws(self, context: Event) -> None:
         raise NotImplementedError
@@ -79,7 +146,7 @@ class Kitt:
         """Toggle the visibility of the client window when the appropriate keybind
         command is triggered by the user. Attempt to spawn a client if none is found.
         """
-        if be.binding.command != f"nop {self.name}":
+        if be.binding.command != self._trigger:
             return
         self.log.debug("%s", be.binding.command)
         if not self.refresh():
@@ -113,20 +180,24 @@ class Kitt:
         from tiled to floated.
         """
         con = we.container
-        # note: cf on_moved, for i3 con is our target, but .type == "floating_con" is
-        # only set on the floating wrapper. Hence the need to check .floating.
-        if (con.type != "floating_con" and con.floating != "user_on") or (
+        # ownership first: nearly every floating event in the WM is someone else's
+        if (
             # marks are unique; want to associate to new client if mark has moved...
             not self._cattr_matches(con)
             # ...but only if we're not loyal to an existing association
-            if self.client.cattr == Cattr.CON_MARK and not self.loyal
+            if self._follow_mark
             else con.id != self.con_id
+        ) or (
+            # note: cf on_moved, for i3 con is our target, but .type == "floating_con"
+            # is only set on the floating wrapper. Hence the need to check .floating.
+            con.type != "floating_con"
+            and con.floating != "user_on"
         ):
             return
         if (
             not self.refresh()
             # toggle-while-tiled trigger repression
-            or self.con_ws.name == "__i3_scratch"
+            or self.con_ws.name == _SCRATCH_WS
         ):
             return
         self.align_to_ws(Event.FLOATED)
@@ -142,7 +213,7 @@ class Kitt:
             # marks are unique; want to associate to new client if mark has moved...
             not self._cattr_matches(con)
             # ...but only if we're not loyal to an existing association
-            if self.client.cattr == Cattr.CON_MARK and not self.loyal
+            if self._follow_mark
             # note: event's con is floating wrapper for i3, but target con for sway
             else (con.id != self.con_id and not con.find_by_id(self.con_id))
         ):
@@ -152,7 +223,7 @@ class Kitt:
             # avoid double-triggering
             or self.con_ws.name == self.focused_ws.name
             # avoid triggering on a move to the scratchpad
-            or self.con_ws.name == "__i3_scratch"
+            or self.con_ws.name == _SCRATCH_WS
         ):
             return
         self.align_to_ws(Event.MOVED)
@@ -163,33 +234,29 @@ class Kitt:
 
     def spawn(self) -> None:
         """Spawn a new client window associated with the name of this Kitti3 instance."""
-        if self.client.cmd is None:
+        cmd = self._spawn_cmd
+        if cmd is None:
             self.log.warning("unable to comply: spawning is disabled")
             return
-        cmd = f"exec {self.client.cmd.format(self._escape(self.name))}"
-        if self.client_argv:
-            cmd = f"{cmd} {' '.join(self.client_argv)}"
         reply = self.i3.command(cmd)[0]
         self.log.debug("%s -> %s", cmd, reply.success and "OK" or reply.error)
 
     def send(self, *cmds: str) -> None:
-        c = self.commands
+        c = _COMMANDS
         crit = c.crit.format("con_id", self.con_id)
         payload = f"{crit} {', '.join(cmds)}"
         replies = self.i3.command(payload)
-        if self.debug:
+        if self.log.isEnabledFor(logging.DEBUG):
             self.log.debug(crit)
             for cmd, reply in zip(cmds, replies):
                 self.log.debug("  %s -> %s", cmd, reply.success and "OK" or reply.error)
 
     def send_rule(self, *cmds: str) -> None:
-        c = self.commands
-        crit = c.crit.format(self.client.cattr, self._escape(self.name))
-        pre = f"{c.rule} {crit}"
+        pre = self._rule_pre
         cmd_str = ", ".join(cmds)
         payload = f"{pre} '{cmd_str}'"
         reply = self.i3.command(payload)[0]
-        if self.debug:
+        if self.log.isEnabledFor(logging.DEBUG):
             self.log.debug(pre)
             self.log.debug(
                 "  '%s' -> %s", cmd_str, reply.success and "OK" or reply.error
@@ -199,37 +266,40 @@ class Kitt:
         """Update the information on the presence of the associated client instance,
         its workspace and the focused workspace.
         """
-        eager = self.con_id is None or (
-            self.client.cattr == Cattr.CON_MARK and not self.loyal
-        )
+        eager = self.con_id is None or self._follow_mark
+        tree = self.i3.get_tree()
+        # needed below regardless; it is also usually the client itself right
+        # after a spawn or toggle, which spares a walk of the whole tree
+        focused = tree.find_focused()
         con = None
-        for candidate in self.i3.get_tree():
-            if (eager and self._cattr_matches(candidate)) or (
-                not eager and candidate.id == self.con_id
-            ):
-                con = candidate
-                break
-        if con is None:
-            _old_id = self.con_id
-            self.con_id = self.con_ws = self.con_rect = None
-            if not eager:
+        if not eager:
+            con = tree.find_by_id(self.con_id)
+            if con is None:
                 self.log.info(
-                    "con_id: %s has despawned; looking for an alternative", _old_id
+                    "con_id: %s has despawned; looking for an alternative", self.con_id
                 )
-                return self.refresh()
+                # the tree we already have is as good a place to look as any
+                eager = True
+        if eager:
+            if focused is not None and self._cattr_matches(focused):
+                con = focused
+            else:
+                con = next((c for c in tree if self._cattr_matches(c)), None)
+        if con is None:
+            self.con_id = self.con_ws = self.con_rect = None
         else:
             self.con_id = con.id
             self.con_ws = con.workspace()
             self.con_rect = Rect.from_i3ipc(con.rect)
 
-        # WS refs from get_tree() are stubs with no focus info,
-        # so have to perform a second query
-        for ws in self.i3.get_workspaces():
-            if ws.focused:
-                self.focused_ws = ws
-                break
-        else:
-            self.focused_ws = None
+        # WS nodes in the tree carry no focus info of their own, but the focused
+        # con does; only perform a second query if it isn't on a workspace
+        self.focused_ws = focused.workspace() if focused is not None else None
+        if self.focused_ws is None:
+            for ws in self.i3.get_workspaces():
+                if ws.focused:
+                    self.focused_ws = ws
+                    break
 
         self.log.debug(
             "con_id: %s, con_ws: %s, focused_ws: %s",
@@ -237,7 +307,11 @@ class Kitt:
             getattr(self.con_ws, "name", None),
             getattr(self.focused_ws, "name", None),
         )
-        ok = None not in (self.con_id, self.con_ws, self.focused_ws)
+        ok = (
+            self.con_id is not None
+            and self.con_ws is not None
+            and self.focused_ws is not None
+        )
         if not ok:
             if self.con_id is None:
                 self.log.info('no con matching [%s="%s"]', self.client.cattr, self.name)
@@ -245,40 +319,25 @@ class Kitt:
                 self.log.warning("missing workspace guard tripped")
         return ok
 
-    @functools.lru_cache()
     def target_rect(self, abs_ref: Rect = None) -> Rect:
-        # relative/ppt
         if abs_ref is None:
-            width = round(self.shape.x * 100)
-            height = round(self.shape.y * 100)
-            x = {
-                Loc.LEFT: 0,
-                Loc.CENTER: round(50 - (width / 2)),
-                Loc.RIGHT: 100 - width,
-            }[self.pos.x]
-            y = {
-                Loc.TOP: 0,
-                Loc.CENTER: round(50 - (height / 2)),
-                Loc.BOTTOM: 100 - height,
-            }[self.pos.y]
-        # absolute/px
-        else:
-            width = round(abs_ref.w * self.shape.x)
-            height = round(abs_ref.h * self.shape.y)
-            x = {
-                Loc.LEFT: abs_ref.x,
-                Loc.CENTER: abs_ref.x + round((abs_ref.w / 2) - (width / 2)),
-                Loc.RIGHT: abs_ref.x + abs_ref.w - width,
-            }[self.pos.x]
-            y = {
-                Loc.TOP: abs_ref.y,
-                Loc.CENTER: abs_ref.y + round((abs_ref.h / 2) - (height / 2)),
-                Loc.BOTTOM: abs_ref.y + abs_ref.h - height,
-            }[self.pos.y]
+            return self._ppt_rect
+        rect = self._rect_cache.get(abs_ref)
+        if rect is None:
+            rect = self._rect_cache[abs_ref] = self._compute_target_rect(abs_ref)
+        return rect
+
+    def _compute_target_rect(self, abs_ref: Optional[Rect]) -> Rect:
+        # relative (ppt) rects are computed against a 100x100 reference
+        ref = _PPT_REF if abs_ref is None else abs_ref
+        width = round(ref.w * self.shape.x)
+        height = round(ref.h * self.shape.y)
+        x = ref.x + round((ref.w - width) * self._align_x)
+        y = ref.y + round((ref.h - height) * self._align_y)
         return Rect(x, y, width, height)
 
     def _cattr_matches(self, con: i3ipc.Con) -> bool:
-        cval = getattr(con, self.client.cattr.value)
+        cval = self._get_cattr(con)
         if cval is None:
             return False
         if (isinstance(cval, str) and cval == self.name) or (
@@ -295,20 +354,21 @@ class Kitt:
 
 
 class Kitts(Kitt):
+    __slots__ = ()
+    # Currently under Sway, if a container on an inactive workspace is moved, it is
+    # forcibly reparented to its output's active workspace. Therefore, this feature
+    # is diabled (window::move is not subscribed to), pending
+    # https://github.com/swaywm/sway/issues/6465 .
+    _EVENTS = tuple(e for e in Kitt._EVENTS if e[0] != "window::move")
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-    def on_moved(self, _, we: i3ipc.WindowEvent) -> None:
-        # Currently under Sway, if a container on an inactive workspace is moved, it
-        # is forcibly reparented to its output's active workspace. Therefore, this
-        # feature is diabled, pending https://github.com/swaywm/sway/issues/6465 .
-        return
-
     def spawn(self) -> None:
         if self.client.cmd is None:
             return
         r = self.target_rect()
-        c = self.commands
+        c = _COMMANDS
         self.send_rule(c.float_, c.resize.format(r.w, r.h), c.move.format(r.x, r.y))
         super().spawn()
 
@@ -319,7 +379,7 @@ class Kitts(Kitt):
             time.sleep(self.crosstalk_delay)
         self.log.debug(event)
         r = self.target_rect()
-        c = self.commands
+        c = _COMMANDS
         if event == Event.SHOW:
             if self.anim.enabled and self.anim.show is not None:
                 self._animate()
@@ -334,13 +394,13 @@ class Kitts(Kitt):
             if self.anim.enabled and self.anim.hide is not None and self._undisturbed():
                 self._animate(hide=True)
             else:
-                self.send(self.commands.hide)
+                self.send(c.hide)
         else:
             self.send(c.resize.format(r.w, r.h), c.move.format(r.x, r.y))
 
     def _animate(self, hide: bool = False) -> None:
         r = self.target_rect()
-        c = self.commands
+        c = _COMMANDS
         role_x, role_y, start, end = {
             Loc.LEFT: ("{}", r.y, 0 - r.w, r.x),
             Loc.RIGHT: ("{}", r.y, 100, r.x),
@@ -361,7 +421,7 @@ class Kitts(Kitt):
                     c.focus,
                 )
             elif last and hide:
-                self.send(self.commands.hide)
+                self.send(c.hide)
             else:
                 self.send(move_partial.format(pos))
 
@@ -374,21 +434,23 @@ class Kitts(Kitt):
         wr = self.focused_ws.rect
         # note: sway truncates when doing ppt->px conversion
         # (see e.g. resize.c:resize_set_floating, struct movement_amount)
-        return False not in [
-            cr.x == int((tr.x / 100) * wr.width + wr.x),
-            cr.y == int((tr.y / 100) * wr.height + wr.y),
-            cr.w == int(wr.width * (tr.w / 100)),
-            cr.h == int(wr.height * (tr.h / 100)),
-        ]
+        return (
+            cr.x == int((tr.x / 100) * wr.width + wr.x)
+            and cr.y == int((tr.y / 100) * wr.height + wr.y)
+            and cr.w == int(wr.width * (tr.w / 100))
+            and cr.h == int(wr.height * (tr.h / 100))
+        )
 
 
 class Kitti3(Kitt):
+    __slots__ = ()
+
     def align_to_ws(self, event: Event) -> None:
         # Under i3, in multi-output configurations, a ppt move is considered relative
         # to the rect defined by the bounding box of all outputs, not by the con's
         # workspace. Yes, this is madness, and so we have to do absolute moves (and
         # therefore we also do absolute resizes to stay consistent).
-        c = self.commands
+        c = _COMMANDS
         if event == Event.SPAWNED:
             # floating will trigger on_floated to do the actual alignment
             self.send(c.float_)
@@ -403,6 +465,6 @@ class Kitti3(Kitt):
                 c.focus,
             )
         elif event == Event.HIDE:
-            self.send(self.commands.hide)
+            self.send(c.hide)
         else:
             self.send(c.resize_abs.format(r.w, r.h), c.move_abs.format(r.x, r.y))
@@ -1,9 +1,10 @@
 import argparse
 import enum
 import time
-from typing import Callable, List, NamedTuple, Optional
+from typing import TYPE_CHECKING, Callable, NamedTuple, Optional, Sequence, Union
 
-import i3ipc
+if TYPE_CHECKING:
+    import i3ipc
 
 
 class AnimParams(NamedTuple):
@@ -62,28 +63,27 @@ class Pos(enum.Enum):
     RC = CR = enum.auto()
     RB = BR = enum.auto()
 
-    def __init__(self, _):
-        self.compat: bool = False
-        self.anchor: Optional[Loc] = None
-
     def __str__(self):
         return self.name
 
     @classmethod
     def from_str(cls, name) -> "Pos":
         try:
-            pos = cls[name.upper()]
+            return cls[name.upper()]
         except KeyError:
             raise argparse.ArgumentTypeError(
                 f"'{name}' is not a valid position"
             ) from None
-        if name.upper() in ("LEFT", "RIGHT"):
-            pos.compat = True
-        pos.anchor = cls._anchor_for(name.upper())
-        return pos
 
     @staticmethod
-    def _anchor_for(name):
+    def is_compat(name: str) -> bool:
+        """Whether name is one of the legacy LEFT/RIGHT positions."""
+        return name.upper() in ("LEFT", "RIGHT")
+
+    @staticmethod
+    def anchor_for(name: str) -> Optional[Loc]:
+        """The edge to animate in from, or None for CC."""
+        name = name.upper()
         if name == "CC":
             return None
         elif name[0] == "C":
@@ -107,7 +107,7 @@ class Rect(NamedTuple):
     h: int
 
     @classmethod
-    def from_i3ipc(cls, r: i3ipc.Rect):
+    def from_i3ipc(cls, r: "i3ipc.Rect"):
         return cls(r.x, r.y, r.width, r.height)
 
 
@@ -116,27 +116,25 @@ class Shape(NamedTuple):
     y: float
 
     @classmethod
-    def from_strs(cls, strs: List[str], compat: bool = False) -> "Shape":
+    def from_strs(
+        cls, strs: Sequence[Union[str, float]], compat: bool = False
+    ) -> "Shape":
         fracts = [cls._proper_fraction(v) for v in strs]
         if compat:
             fracts = reversed(fracts)
         return cls(*fracts)
 
     @staticmethod
-    def _proper_fraction(arg: str) -> float:
-        val = None
+    def _proper_fraction(arg: Union[str, float]) -> float:
+        # the defaults are passed through by argparse as floats, unconverted
         try:
-            val = float(arg)
-        except ValueError as e:
-            val = e
-            factors = arg.split("/")
-            if len(factors) == 2:
-                try:
-                    val = float(factors[0]) / float(factors[1])
-                except (ValueError, ZeroDivisionError) as e:
-                    val = e
-            if isinstance(val, Exception):
-                raise argparse.ArgumentTypeError(f"'{arg}': {val}") from None
+            if isinstance(arg, str) and arg.count("/") == 1:
+                num, den = arg.split("/")
+                val = float(num) / float(den)
+            else:
+                val = float(arg)
+        except (ValueError, ZeroDivisionError) as e:
+            raise argparse.ArgumentTypeError(f"'{arg}': {e}") from None
         if not (0 <= val <= 1):
             raise argparse.ArgumentTypeError(
                 f"'{arg}': {val:.3f} is not in the range [0, 1]"